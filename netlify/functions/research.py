@@ -1,66 +1,408 @@
 import os
 import json
-import requests
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import fastjsonschema
+import msgspec
+import urllib3
+from urllib3.util.retry import Retry
+
+# orjson is considerably faster on the large grounded Gemini responses; fall back
+# to the stdlib if the wheel is unavailable. Both helpers work on UTF-8 bytes.
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
+
+def _error_body(message, details=None):
+    """Encode the {"error": ..., "details": ...} body the frontend expects."""
+    error = {"error": message}
+    if details is not None:
+        error["details"] = details
+    return _dumps(error).decode()
+
 
 # --- 1. CONFIGURATION ---
 
 # IMPORTANT: The GEMINI_API_KEY must be set as an environment variable in your Netlify dashboard.
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY") 
 
+# The environment cannot change within a container, so the missing-key error
+# body is encoded once here rather than on every request. It is None when the
+# function is configured.
+_ERR_MISSING_KEY = None if GEMINI_API_KEY else _error_body(
+    "Server API Key is missing. Set GEMINI_API_KEY environment variable in Netlify."
+)
+
 MODEL_NAME = "gemini-2.5-flash-preview-09-2025"
-API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL_NAME}:generateContent?key={GEMINI_API_KEY}"
+API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL_NAME}:streamGenerateContent?alt=sse"
+
+# Each run_research call gets one wall-clock budget for the whole Gemini
+# exchange (connect, any retry, first chunk and the rest of the stream). It sits
+# under Netlify's 26 s synchronous function limit with room to build the response.
+# A stalled connect fails fast so it leaves most of the budget for the model.
+RESEARCH_BUDGET_SECONDS = 24.0
+CONNECT_TIMEOUT_SECONDS = 2.0
+
+
+class _DeadlineTimeout(urllib3.Timeout):
+    """
+    A urllib3 Timeout bounded by a fixed monotonic deadline. urllib3 clones the
+    timeout for every attempt, retries included, so each clone re-derives its
+    connect and read limits from whatever is left of the budget.
+    """
+
+    def __init__(self, deadline):
+        # urllib3 rejects non-positive timeouts; an exhausted budget times out at once
+        remaining = max(deadline - time.monotonic(), 0.001)
+        super().__init__(connect=min(CONNECT_TIMEOUT_SECONDS, remaining), read=remaining)
+        self.deadline = deadline
+
+    def clone(self):
+        return _DeadlineTimeout(self.deadline)
+
+class _GeminiRetry(Retry):
+    """
+    urllib3 counts ProtocolError (a pooled keep-alive socket that died before
+    any response, e.g. RemoteDisconnected) as a read error, so read=0 would
+    also refuse to retry it. Only a read timeout means Gemini may already be
+    generating; everything else before a response is treated as a connection
+    failure and gets the normal retry.
+    """
+
+    def _is_read_error(self, err):
+        return isinstance(err, urllib3.exceptions.ReadTimeoutError)
+
+
+# Module-level pool so warm containers keep the TLS connection to the Gemini
+# endpoint alive between invocations instead of re-handshaking every request.
+# urllib3 is used directly rather than requests to keep the cold-start import
+# graph small (no requests/charset_normalizer/idna).
+_HTTP = urllib3.PoolManager(
+    num_pools=1,
+    maxsize=4,
+    # Retry once, and only when Gemini never started generating: a failed
+    # connect, a reused connection that was dropped before any response, or a
+    # rate-limit/gateway status returned in place of the stream. Read timeouts
+    # are not retried (read=0), because re-sending the POST would start, and
+    # bill, a second generation. There is no backoff: urllib3 does not sleep
+    # before the first retry, and Retry-After is ignored, so a server-requested
+    # wait cannot eat into the call's budget.
+    retries=_GeminiRetry(
+        total=1,
+        read=0,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({'POST'}),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    ),
+    headers={
+        'Connection': 'keep-alive',
+        'Content-Type': 'application/json',
+        # Sent as a header rather than a ?key= query parameter so it stays out
+        # of URLs in logs and error messages.
+        'x-goog-api-key': GEMINI_API_KEY or '',
+        # Grounded responses are large, highly compressible JSON. make_headers
+        # only advertises br/zstd when the matching decoder is installed, and
+        # urllib3 inflates the body transparently.
+        **urllib3.util.make_headers(accept_encoding=True),
+    },
+)
 
 # --- 2. AGENT DEFINITIONS ---
-SYSTEM_PROMPT = """
-You are a Senior UI/UX and AI Research Analyst focused on modern web application development. Your task is to perform web search using the provided tools and collect high-quality, up-to-date resources for building an AI-powered website builder with exceptional UI/UX, similar to lovable.dev.
-Analyze the user's request and provide the most relevant and powerful technologies and concepts. Your output MUST strictly adhere to the provided JSON schema. Do not include any introductory or concluding text outside of the JSON block.
-Ensure all entries are well-researched, current, and directly relate to building a modern, performant, and user-friendly web application.
-"""
-
-RESPONSE_SCHEMA = {
-    "type": "OBJECT",
-    "properties": {
-        "designPrinciples": {
-            "type": "ARRAY",
-            "description": "Key UI/UX design philosophies, methodologies, or libraries relevant to modern AI builders.",
-            "items": {
-                "type": "OBJECT",
-                "properties": {
-                    "name": {"type": "STRING", "description": "The name of the principle or library (e.g., Atomic Design, Shadcn UI)."},
-                    "summary": {"type": "STRING", "description": "A concise 1-2 sentence summary of why this resource is valuable for the project."}
-                },
-                "required": ["name", "summary"]
-            }
-        },
-        "uiFrameworks": {
-            "type": "ARRAY",
-            "description": "Recommended modern component libraries, styling utilities, or frameworks for rapid UI development.",
-            "items": {
-                "type": "OBJECT",
-                "properties": {
-                    "name": {"type": "STRING", "description": "The name of the framework or tool (e.g., React, Svelte, Tailwind CSS)."},
-                    "summary": {"type": "STRING", "description": "A concise 1-2 sentence summary of why this resource is valuable for the project."}
-                },
-                "required": ["name", "summary"]
-            }
-        },
-        "aiApiConcepts": {
-            "type": "ARRAY",
-            "description": "Concepts or specific API use cases for integrating the AI model (Gemini) into the builder workflow.",
-            "items": {
-                "type": "OBJECT",
-                "properties": {
-                    "name": {"type": "STRING", "description": "The name of the concept or API (e.g., Function Calling, Latent Space Image Generation)."},
-                    "summary": {"type": "STRING", "description": "A concise 1-2 sentence summary of how this concept can be applied to the website builder."}
-                }
-            }
+# The prompt and schema live in sidecar files next to this module and are read
+# once per container, which keeps the module itself cheap to compile and load.
+_FUNCTION_DIR = os.path.dirname(os.path.abspath(__file__))
+
+with open(os.path.join(_FUNCTION_DIR, "prompts", "system_prompt.txt"), encoding="utf-8") as f:
+    SYSTEM_PROMPT = f.read().strip()
+
+with open(os.path.join(_FUNCTION_DIR, "schemas", "response_schema.json"), "rb") as f:
+    RESPONSE_SCHEMA = _loads(f.read())
+
+
+def _to_json_schema(schema):
+    """Translate Gemini's OpenAPI-style schema (upper-case type names) to JSON Schema."""
+    if isinstance(schema, dict):
+        return {
+            key: value.lower() if key == "type" and isinstance(value, str) else _to_json_schema(value)
+            for key, value in schema.items()
         }
-    },
-    "required": ["designPrinciples", "uiFrameworks", "aiApiConcepts"]
-}
+    if isinstance(schema, list):
+        return [_to_json_schema(value) for value in schema]
+    return schema
+
+
+# Compiled once per container; guards the frontend against the model drifting
+# from RESPONSE_SCHEMA.
+_validate_research = fastjsonschema.compile(_to_json_schema(RESPONSE_SCHEMA))
+
+# Everything in the Gemini payload except the user prompt is static, so it is
+# encoded to bytes once here. A request body is then _PAYLOAD_HEAD + the encoded
+# prompt + _PAYLOAD_TAIL; the tail drops the leading "{" of the static object.
+_SYSTEM_PROMPT_BYTES = _dumps(SYSTEM_PROMPT)
+_RESPONSE_SCHEMA_BYTES = _dumps(RESPONSE_SCHEMA)
+
+_PAYLOAD_HEAD = b'{"contents":[{"parts":[{"text":'
+_PAYLOAD_TAIL = b"".join((
+    b'}]}],',
+    b'"tools":[{"google_search":{}}],',  # Enable Google Search
+    b'"systemInstruction":{"parts":[{"text":', _SYSTEM_PROMPT_BYTES, b'}]},',
+    b'"generationConfig":{"responseMimeType":"application/json","responseSchema":', _RESPONSE_SCHEMA_BYTES, b'}}',
+))
+
+
+# --- 3. PROMPT CACHE ---
+
+# Warm containers keep module state between invocations, so repeat prompts can
+# be answered from memory instead of another multi-second Gemini call.
+CACHE_MAX_ENTRIES = 64
+CACHE_TTL_SECONDS = 60 * 60
+
+# cache key -> (expires_at, encoded [research_data, sources]), oldest entry first.
+# Entries are stored encoded so callers never share mutable objects with the cache.
+_CACHE = OrderedDict()
+# Netlify runs one event at a time, but run_research may also be served from a
+# threaded process; lookups and evictions are check-then-act, so they share a lock.
+_CACHE_LOCK = threading.Lock()
+
+
+def _cache_key(prompt_bytes):
+    return hashlib.blake2b(prompt_bytes, digest_size=16).hexdigest()
+
+
+def _cache_get(key):
+    with _CACHE_LOCK:
+        entry = _CACHE.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _CACHE[key]
+            return None
+        _CACHE.move_to_end(key)
+        return entry[1]
+
+
+def _cache_put(key, value):
+    with _CACHE_LOCK:
+        _CACHE[key] = (time.monotonic() + CACHE_TTL_SECONDS, value)
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > CACHE_MAX_ENTRIES:
+            _CACHE.popitem(last=False)
+
+
+# --- 4. GEMINI RESPONSE TYPES ---
+
+# Only the fields the handler reads are declared; msgspec skips everything else
+# while decoding, and validates the shape of what it keeps in the same pass.
+
+class _Web(msgspec.Struct):
+    uri: str = ""
+    title: str = "No Title Available"
+
+
+class _Attribution(msgspec.Struct):
+    web: _Web | None = None
+
+
+class _GroundingMetadata(msgspec.Struct, rename="camel"):
+    grounding_attributions: list[_Attribution] = []
+
+
+class _Part(msgspec.Struct):
+    text: str = ""
+
+
+class _Content(msgspec.Struct):
+    parts: list[_Part] = []
 
 
-# --- 3. NETLIFY HANDLER FUNCTION ---
+class _Candidate(msgspec.Struct, rename="camel"):
+    content: _Content = msgspec.field(default_factory=_Content)
+    grounding_metadata: _GroundingMetadata | None = None
+
+
+class _GeminiChunk(msgspec.Struct):
+    candidates: list[_Candidate] = []
+
+
+_CHUNK_DECODER = msgspec.json.Decoder(_GeminiChunk)
+
+
+# --- 5. RESEARCH PIPELINE ---
+
+class ResearchError(Exception):
+    """
+    A research request that failed in a way the caller should report with a
+    specific status code. `body` is the already-encoded JSON error body.
+    """
+
+    def __init__(self, status_code, body):
+        super().__init__(body)
+        self.status_code = status_code
+        self.body = body
+
+
+# Error bodies with fixed text are encoded once rather than on every failure.
+_ERR_EMPTY_CANDIDATES = _error_body("Gemini API returned an empty candidate list.")
+_ERR_NO_CONTENT = _error_body("Gemini API failed to return structured JSON content.")
+_ERR_MALFORMED_CHUNK = _error_body("Gemini API returned a malformed response.")
+_ERR_MALFORMED_RESEARCH = _error_body("Gemini API returned content that is not valid JSON.")
+_ERR_TIMEOUT = _error_body("Gemini API request timed out.")
+
+
+def _sse_events(response, deadline):
+    """
+    Yield each decoded chunk of the streamGenerateContent SSE response as it
+    arrives. The socket read timeout only bounds a single read, so a stream that
+    keeps trickling chunks is cut off here once `deadline` passes, and every
+    following read may wait at most for the time still left.
+    """
+    sock = getattr(response.connection, 'sock', None)
+    for line in response:
+        if line.startswith(b"data:"):
+            yield _CHUNK_DECODER.decode(line[5:])
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ResearchError(504, _ERR_TIMEOUT)
+        if sock is not None:
+            sock.settimeout(remaining)
+
+
+def run_research(user_prompt):
+    """
+    Run one research prompt through Gemini and return (research_data, sources).
+
+    This holds everything that is not specific to Netlify's event format, so
+    the same pipeline (connection pool, prompt cache, validation) can be served
+    from a long-lived process as well as from the function handler below.
+    Raises ResearchError for failures with a known status code; network
+    failures surface as urllib3.exceptions.HTTPError. The returned objects
+    belong to the caller: cache hits decode a fresh copy.
+    """
+
+    # Serve repeat prompts from the warm-container cache
+    prompt_bytes = _dumps(user_prompt)
+    cache_key = _cache_key(prompt_bytes)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        research_data, sources = _loads(cached)
+        return research_data, sources
+
+    # Construct Gemini Payload (prompt spliced into the precomputed body)
+    payload = b"".join((_PAYLOAD_HEAD, prompt_bytes, _PAYLOAD_TAIL))
+
+    # Call Gemini API (streamed, so chunks are parsed while the model is still generating)
+    deadline = time.monotonic() + RESEARCH_BUDGET_SECONDS
+    response = _HTTP.request('POST', API_URL, body=payload, timeout=_DeadlineTimeout(deadline), preload_content=False)
+    text_parts = []
+    grounding_metadata = None
+    received_candidate = False
+    stream_finished = False
+    try:
+        # Treat bad status codes (4xx or 5xx) as errors
+        if response.status >= 400:
+            raise ResearchError(502, _error_body(
+                f"Gemini API returned HTTP {response.status}.",
+                response.read()[:200].decode(errors="replace"),
+            ))
+
+        # Extract and Process Response
+        for chunk in _sse_events(response, deadline):
+            try:
+                candidate = chunk.candidates[0]
+            except IndexError:
+                continue
+            received_candidate = True
+            try:
+                text_parts.append(candidate.content.parts[0].text)
+            except IndexError:
+                pass
+            # Grounding metadata arrives with the final chunk
+            if candidate.grounding_metadata is not None:
+                grounding_metadata = candidate.grounding_metadata
+        stream_finished = True
+    except msgspec.DecodeError as e:
+        raise ResearchError(502, _ERR_MALFORMED_CHUNK) from e
+    finally:
+        # Only a fully read stream leaves the connection reusable; on errors the
+        # socket is discarded rather than waiting for the rest of the generation.
+        if stream_finished:
+            response.drain_conn()
+        else:
+            response.close()
+        response.release_conn()
+
+    if not received_candidate:
+        raise ResearchError(500, _ERR_EMPTY_CANDIDATES)
+
+    json_text = "".join(text_parts)
+    if not json_text:
+        raise ResearchError(500, _ERR_NO_CONTENT)
+
+    # The AI returns JSON as a string, so we must parse it
+    try:
+        research_data = _loads(json_text)
+    except ValueError as e:
+        raise ResearchError(502, _ERR_MALFORMED_RESEARCH) from e
+
+    try:
+        _validate_research(research_data)
+    except fastjsonschema.JsonSchemaException as e:
+        raise ResearchError(502, _error_body("Gemini API returned research that does not match the expected schema.", e.message)) from e
+
+    # Extract citations/sources
+    attributions = grounding_metadata.grounding_attributions if grounding_metadata is not None else ()
+    sources = [
+        {"uri": web.uri, "title": web.title}
+        for attribution in attributions
+        if (web := attribution.web) is not None and web.uri
+    ]
+
+    _cache_put(cache_key, _dumps((research_data, sources)))
+    return research_data, sources
+
+
+# --- 6. NETLIFY HANDLER FUNCTION ---
+
+_ERR_MISSING_PROMPT = _error_body("Missing prompt in request data.")
+_ERR_INVALID_BODY = _error_body("Request body must be a JSON object.")
+_ERR_INVALID_PROMPT = _error_body("Prompt must be a string.")
+
+
+def _error_response(status_code, body):
+    # Always a new dict: only the encoded bodies are shared, so a caller that
+    # adds headers to one response cannot leak them into later ones.
+    return {"statusCode": status_code, "body": body}
+
+
+def _success_response(research_data, sources):
+    return {
+        "statusCode": 200,
+        "headers": { 'Content-Type': 'application/json' },
+        "body": _dumps({
+            "research": research_data,
+            "sources": sources
+        }).decode()
+    }
+
+
+def _is_timeout(error):
+    # Exhausted retries wrap the final error in MaxRetryError. NewConnectionError
+    # (e.g. connection refused) subclasses ConnectTimeoutError but is not a timeout.
+    reason = getattr(error, 'reason', error)
+    return (isinstance(reason, urllib3.exceptions.TimeoutError)
+            and not isinstance(reason, urllib3.exceptions.NewConnectionError))
+
 
 def handler(event, context):
     """
@@ -69,213 +411,37 @@ def handler(event, context):
     """
     
     # 1. API Key Check
-    if not GEMINI_API_KEY:
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "Server API Key is missing. Set GEMINI_API_KEY environment variable in Netlify."})
-        }
+    if _ERR_MISSING_KEY is not None:
+        return _error_response(500, _ERR_MISSING_KEY)
 
     try:
         # 2. Input Validation (Parsing the JSON body from the event)
-        if event.get('body'):
-            data = json.loads(event['body'])
-            user_prompt = data.get('prompt')
-        else:
-            return {
-                "statusCode": 400, 
-                "body": json.dumps({"error": "Missing prompt in request data."})
-            }
-
-        # 3. Construct Gemini Payload
-        payload = {
-            "contents": [{"parts": [{"text": user_prompt}]}],
-            "tools": [{"google_search": {} }], # Enable Google Search
-            "systemInstruction": {"parts": [{"text": SYSTEM_PROMPT}]},
-            "generationConfig": {
-                "responseMimeType": "application/json",
-                "responseSchema": RESPONSE_SCHEMA
-            }
-        }
-
-        # 4. Call Gemini API
-        response = requests.post(
-            API_URL, 
-            headers={'Content-Type': 'application/json'}, 
-            data=json.dumps(payload),
-            timeout=30
-        )
-        # Raises an exception for bad status codes (4xx or 5xx)
-        response.raise_for_status() 
-        
-        # 5. Extract and Process Response
-        result = response.json()
-        candidate = result.get('candidates', [{}])[0]
-
-        if not candidate:
-            return {"statusCode": 500, "body": json.dumps({"error": "Gemini API returned an empty candidate list."})}
-
-        json_text = candidate.get('content', {}).get('parts', [{}])[0].get('text')
-        grounding_metadata = candidate.get('groundingMetadata', {})
-        
-        if not json_text:
-            return {"statusCode": 500, "body": json.dumps({"error": "Gemini API failed to return structured JSON content."})}
-        
-        # The AI returns JSON as a string, so we must parse it
-        research_data = json.loads(json_text)
-
-        # Extract citations/sources
-        sources = []
-        if grounding_metadata and grounding_metadata.get('groundingAttributions'):
-            for attribution in grounding_metadata['groundingAttributions']:
-                web = attribution.get('web')
-                if web and web.get('uri'):
-                    sources.append({
-                        "uri": web['uri'],
-                        "title": web.get('title', 'No Title Available')
-                    })
-
-        # 6. Return the consolidated data to the frontend
-        return {
-            "statusCode": 200,
-            "headers": { 'Content-Type': 'application/json' },
-            "body": json.dumps({
-                "research": research_data,
-                "sources": sources
-            })
-        }
+        if not event.get('body'):
+            return _error_response(400, _ERR_MISSING_PROMPT)
+        try:
+            user_prompt = _loads(event['body']).get('prompt')
+        except (ValueError, AttributeError):
+            return _error_response(400, _ERR_INVALID_BODY)
+        if not user_prompt:
+            return _error_response(400, _ERR_MISSING_PROMPT)
+        # Anything else would be spliced into the Gemini payload as a non-string "text"
+        if not isinstance(user_prompt, str):
+            return _error_response(400, _ERR_INVALID_PROMPT)
+
+        # 3. Research (cached, or a streamed Gemini call)
+        research_data, sources = run_research(user_prompt)
+
+        # 4. Return the consolidated data to the frontend
+        return _success_response(research_data, sources)
+
+    except ResearchError as e:
+        return _error_response(e.status_code, e.body)
+
+    except urllib3.exceptions.HTTPError as e:
+        if _is_timeout(e):
+            return _error_response(504, _ERR_TIMEOUT)
+        return _error_response(502, _error_body("Could not reach the Gemini API.", str(e)))
 
     except Exception as e:
-        # Catch any errors during execution (network, parsing, etc.)
-        return {"statusCode": 500, "body": json.dumps({"error": f"An unexpected server error occurred: {str(e)}", "details": str(e)})}        </div>
-    </div>
-
-    <script>
-        // --- Rendering Functions (Frontend Responsibility) ---
-
-        function renderCategory(title, data, iconName) {
-            let itemsHtml = data.map(item => `
-                <div class="p-5 bg-gray-50 rounded-xl border border-gray-200">
-                    <h4 class="text-lg font-semibold text-indigo-700">${item.name}</h4>
-                    <p class="text-gray-600 mt-1">${item.summary}</p>
-                </div>
-            `).join('');
-
-            return `
-                <section>
-                    <h3 class="text-xl font-bold text-gray-800 mb-4 flex items-center">
-                        <i data-lucide="${iconName}" class="w-5 h-5 mr-2 text-indigo-500"></i>
-                        ${title}
-                    </h3>
-                    <div class="grid grid-cols-1 md:grid-cols-2 gap-4">
-                        ${itemsHtml}
-                    </div>
-                </section>
-            `;
-        }
-
-        function renderSources(sources) {
-            const sourceList = document.getElementById('sourceList');
-            const sourcesBox = document.getElementById('sourcesBox');
-            sourceList.innerHTML = '';
-            
-            if (sources.length === 0) {
-                sourcesBox.classList.add('hidden');
-                return;
-            }
-
-            sourcesBox.classList.remove('hidden');
-
-            sources.forEach((source, index) => {
-                const sourceElement = document.createElement('div');
-                sourceElement.innerHTML = `
-                    <a href="${source.uri}" target="_blank" rel="noopener noreferrer" class="hover:underline text-indigo-600 font-medium">
-                        [${index + 1}] ${source.title || 'Source Link'}
-                    </a>
-                `;
-                sourceList.appendChild(sourceElement);
-            });
-        }
-
-        // --- Main Frontend Logic ---
-
-        window.handleGenerate = async function() {
-            const userPrompt = document.getElementById('userPrompt').value;
-            const generateButton = document.getElementById('generateButton');
-            const loadingIcon = document.getElementById('loadingIcon');
-            const searchIcon = document.getElementById('searchIcon');
-            const resultsContainer = document.getElementById('resultsContainer');
-            const contentArea = document.getElementById('contentArea');
-            const errorMessage = document.getElementById('errorMessage');
-
-            if (!userPrompt.trim()) {
-                errorMessage.textContent = "Please enter a prompt to start the research.";
-                errorMessage.classList.remove('hidden');
-                return;
-            }
-
-            // Reset UI
-            resultsContainer.classList.add('hidden');
-            errorMessage.classList.add('hidden');
-            contentArea.innerHTML = '';
-
-            // Loading state
-            generateButton.disabled = true;
-            generateButton.classList.add('bg-gray-400');
-            generateButton.classList.remove('bg-indigo-600', 'hover:bg-indigo-700');
-            loadingIcon.classList.remove('hidden');
-            searchIcon.classList.add('hidden');
-            generateButton.querySelector('span').textContent = 'Researching...';
-
-            try {
-                // CORE CHANGE: Fetching from the Netlify Function endpoint
-                // The URL maps to netlify/functions/research.py
-                const response = await fetch('/netlify/functions/research', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ prompt: userPrompt })
-                });
-
-                const data = await response.json();
-
-                if (!response.ok) {
-                    throw new Error(data.error || 'Serverless function returned an error.');
-                }
-                
-                const researchData = data.research;
-                const sources = data.sources;
-
-                // Render Results
-                contentArea.innerHTML = 
-                    renderCategory('AI API Concepts & Integration', researchData.aiApiConcepts, 'brain-circuit') +
-                    renderCategory('UI Frameworks & Component Libraries', researchData.uiFrameworks, 'layout-list') +
-                    renderCategory('Key Design Principles & Patterns', researchData.designPrinciples, 'palette');
-
-                renderSources(sources);
-
-                resultsContainer.classList.remove('hidden');
-                
-                // Re-create icons for the new content
-                lucide.createIcons(); 
-
-            } catch (error) {
-                console.error("Fetch or Parsing Error:", error);
-                errorMessage.textContent = `Research failed: ${error.message}. Please check the browser console and Netlify function logs for details.`;
-                errorMessage.classList.remove('hidden');
-            } finally {
-                // Reset loading state
-                generateButton.disabled = false;
-                generateButton.classList.remove('bg-gray-400');
-                generateButton.classList.add('bg-indigo-600', 'hover:bg-indigo-700');
-                loadingIcon.classList.add('hidden');
-                searchIcon.classList.remove('hidden');
-                generateButton.querySelector('span').textContent = 'Start Research & Collect Resources';
-            }
-        }
-        
-        // Initial setup for icons
-        document.addEventListener('DOMContentLoaded', () => {
-             lucide.createIcons(); 
-        });
-    </script>
-</body>
-</html>
+        # Last resort for anything unanticipated
+        return _error_response(500, _error_body(f"An unexpected server error occurred: {str(e)}", str(e)))
@@ -0,0 +1,257 @@
+"""
+Tests for netlify/functions/research.py against a local stub of the Gemini
+streamGenerateContent endpoint. Run with `python -m unittest discover tests`.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "netlify", "functions"))
+
+import research  # noqa: E402
+import urllib3  # noqa: E402
+
+RESEARCH = {
+    "designPrinciples": [{"name": "Atomic Design", "summary": "Composable UI."}],
+    "uiFrameworks": [{"name": "Tailwind CSS", "summary": "Utility-first styling."}],
+    "aiApiConcepts": [{"name": "Function Calling", "summary": "Structured tool use."}],
+}
+GROUNDING = {"groundingAttributions": [
+    {"web": {"uri": "https://a.example", "title": "A"}},
+    {"web": {"uri": "https://b.example"}},
+    {"web": {}},
+    {},
+]}
+
+
+def sse_chunk(text="", grounding=None):
+    candidate = {"content": {"parts": [{"text": text}]}}
+    if grounding is not None:
+        candidate["groundingMetadata"] = grounding
+    return b"data: " + json.dumps({"candidates": [candidate]}).encode() + b"\r\n\r\n"
+
+
+def research_stream(research_data=RESEARCH, grounding=GROUNDING):
+    """The model output split over two SSE events, metadata on the last one."""
+    text = json.dumps(research_data)
+    half = len(text) // 2
+    return [sse_chunk(text[:half]), sse_chunk(text[half:], grounding)]
+
+
+class StubGemini(BaseHTTPRequestHandler):
+    """
+    Replays the current test's `reply` list for each POST. Items are bytes
+    (one SSE chunk), a float (sleep before the next write), an int (send
+    that status with a JSON error body), or "drop" (close without answering).
+    """
+
+    protocol_version = "HTTP/1.1"
+    replies = []
+    posts = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        StubGemini.posts.append((self.path, dict(self.headers), body))
+        reply = StubGemini.replies.pop(0) if len(StubGemini.replies) > 1 else StubGemini.replies[0]
+        try:
+            self._send(reply)
+        except OSError:
+            pass  # the client gave up on this stream
+
+    def _send(self, reply):
+        if reply == "drop":
+            self.close_connection = True
+            return
+        if isinstance(reply, int):
+            payload = b'{"error": {"message": "stub error"}}'
+            self.send_response(reply)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for item in reply:
+            if isinstance(item, float):
+                time.sleep(item)
+                continue
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(item), item))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class ResearchHandlerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubGemini)
+        cls.server.daemon_threads = True
+        cls.server.block_on_close = False
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self._saved = {
+            name: getattr(research, name)
+            for name in ("API_URL", "RESEARCH_BUDGET_SECONDS", "CONNECT_TIMEOUT_SECONDS")
+        }
+        research.API_URL = f"http://127.0.0.1:{self.server.server_port}/v1beta/models/m:streamGenerateContent?alt=sse"
+        research._CACHE.clear()
+        StubGemini.replies = [research_stream()]
+        StubGemini.posts = []
+
+    def tearDown(self):
+        for name, value in self._saved.items():
+            setattr(research, name, value)
+
+    def call(self, body):
+        return research.handler({"body": body}, None)
+
+    def ask(self, prompt):
+        return self.call(json.dumps({"prompt": prompt}))
+
+    def assertError(self, response, status_code):
+        self.assertEqual(response["statusCode"], status_code, response)
+        self.assertIn("error", json.loads(response["body"]))
+
+    # --- success and caching ---
+
+    def test_returns_research_and_sources(self):
+        response = self.ask("modern UI")
+
+        self.assertEqual(response["statusCode"], 200)
+        data = json.loads(response["body"])
+        self.assertEqual(data["research"], RESEARCH)
+        self.assertEqual(data["sources"], [
+            {"uri": "https://a.example", "title": "A"},
+            {"uri": "https://b.example", "title": "No Title Available"},
+        ])
+
+    def test_request_carries_prompt_and_key_header(self):
+        self.ask("modern UI")
+
+        path, headers, body = StubGemini.posts[0]
+        self.assertNotIn("key=", path)
+        self.assertEqual(headers["x-goog-api-key"], research.GEMINI_API_KEY)
+        payload = json.loads(body)
+        self.assertEqual(payload["contents"], [{"parts": [{"text": "modern UI"}]}])
+        self.assertEqual(payload["generationConfig"]["responseSchema"], research.RESPONSE_SCHEMA)
+
+    def test_repeat_prompt_is_served_from_cache(self):
+        self.assertEqual(self.ask("cached")["statusCode"], 200)
+        self.assertEqual(self.ask("cached")["statusCode"], 200)
+
+        self.assertEqual(len(StubGemini.posts), 1)
+
+    def test_cached_result_is_not_shared_with_callers(self):
+        research_data, sources = research.run_research("isolated")
+        research_data["designPrinciples"].clear()
+        sources.clear()
+
+        research_data, sources = research.run_research("isolated")
+        self.assertEqual(research_data, RESEARCH)
+        self.assertEqual(len(sources), 2)
+
+    # --- upstream failures ---
+
+    def test_empty_candidates(self):
+        StubGemini.replies = [[b'data: {"candidates": []}\r\n\r\n']]
+
+        self.assertError(self.ask("empty"), 500)
+
+    def test_invalid_model_json(self):
+        StubGemini.replies = [[sse_chunk("{not json")]]
+
+        self.assertError(self.ask("bad json"), 502)
+
+    def test_schema_mismatch(self):
+        StubGemini.replies = [research_stream({"designPrinciples": [{"name": 1}]})]
+
+        self.assertError(self.ask("drift"), 502)
+
+    def test_malformed_chunk_returns_without_draining_the_stream(self):
+        StubGemini.replies = [[b"data: {not json\r\n\r\n", 2.0, sse_chunk()]]
+
+        # Draining a half-read stream would wait for the rest of the generation;
+        # urllib3 happens to give up quickly on chunked bodies, so check the call too.
+        with mock.patch.object(urllib3.response.HTTPResponse, "drain_conn", autospec=True) as drain:
+            started = time.monotonic()
+            response = self.ask("malformed")
+
+        self.assertError(response, 502)
+        self.assertLess(time.monotonic() - started, 1.0)
+        drain.assert_not_called()
+
+    def test_upstream_503_is_retried_once(self):
+        StubGemini.replies = [503]
+
+        self.assertError(self.ask("unavailable"), 502)
+        self.assertEqual(len(StubGemini.posts), 2)
+
+    def test_dropped_keep_alive_connection_is_retried(self):
+        self.assertEqual(self.ask("warm up")["statusCode"], 200)
+        StubGemini.replies = ["drop", research_stream()]
+
+        self.assertEqual(self.ask("after idle")["statusCode"], 200)
+        self.assertEqual(len(StubGemini.posts), 3)
+
+    def test_slow_first_chunk_times_out_without_retry(self):
+        research.RESEARCH_BUDGET_SECONDS = 0.5
+        StubGemini.replies = [[2.0] + research_stream()]
+
+        self.assertError(self.ask("slow"), 504)
+        self.assertEqual(len(StubGemini.posts), 1)
+
+    def test_trickling_stream_is_cut_off_at_the_deadline(self):
+        research.RESEARCH_BUDGET_SECONDS = 1.0
+        StubGemini.replies = [[sse_chunk(), 0.3] * 10 + research_stream()]
+
+        started = time.monotonic()
+        response = self.ask("trickle")
+
+        self.assertError(response, 504)
+        self.assertLess(time.monotonic() - started, 1.5)
+
+    # --- request validation ---
+
+    def test_invalid_requests_are_rejected_before_calling_gemini(self):
+        for body in (None, "", "not json", "[1]", "{}", '{"prompt": ""}',
+                     '{"prompt": 5}', '{"prompt": {"a": 1}}', '{"prompt": ["x"]}', '{"prompt": true}'):
+            with self.subTest(body=body):
+                self.assertError(self.call(body), 400)
+
+        self.assertEqual(StubGemini.posts, [])
+
+    def test_missing_api_key(self):
+        saved = research._ERR_MISSING_KEY
+        research._ERR_MISSING_KEY = research._error_body("Server API Key is missing.")
+        try:
+            self.assertError(self.ask("no key"), 500)
+        finally:
+            research._ERR_MISSING_KEY = saved
+
+    def test_error_responses_are_not_shared(self):
+        first = self.call("{}")
+        first["headers"] = {"Access-Control-Allow-Origin": "*"}
+
+        self.assertNotIn("headers", self.call("{}"))
+
+
+if __name__ == "__main__":
+    unittest.main()